@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Throughput comparison of the MoonBit build against CPython's zlib, gzip,
+zipfile and tarfile.
+
+The MoonBit side is the native `cmd/bench` executable; the CPython side runs
+the equivalent standard-library calls. Both use the same synthetic corpus:
+this script generates it exactly as `corpus.mbt` does and checks the CRC-32
+of every input against the MoonBit report. Each implementation runs in its
+own process per input size, so peak RSS (from wait4) belongs to that run.
+
+The results are printed side by side (MB/s, compression ratio, peak RSS).
+Each run is also appended to a JSON Lines history file. When the history
+has a run from another commit on the same host, MoonBit cases whose
+throughput dropped are listed as regressions.
+
+Usage:
+    python3 cmd/bench/compare.py                     # 1 KiB and 1 MiB
+    python3 cmd/bench/compare.py --size 67108864     # 64 MiB only
+    python3 cmd/bench/compare.py --filter deflate --fail-on-regression
+    python3 cmd/bench/compare.py --moonbit-exe path/to/bench.exe
+"""
+
+import argparse
+import gzip
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tarfile
+import time
+import zipfile
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_SIZES = [1024, 1024 * 1024]
+DEFAULT_HISTORY = Path(__file__).resolve().parent / "history.jsonl"
+MEMBER_SIZE = 65536
+
+# ---------------------------------------------------------------------------
+# Corpus (mirrors cmd/bench/corpus.mbt byte for byte)
+# ---------------------------------------------------------------------------
+
+CORPUS_KINDS = ["text", "binary", "repetitive", "random"]
+
+WORDS = [
+    "the", "archive", "member", "deflate", "block", "window", "match", "length",
+    "distance", "header", "error", "request", "status", "user", "value", "time",
+    "stream", "buffer", "index", "entry", "ok", "failed", "retry", "offset",
+]
+
+
+def lcg_next(state: int) -> int:
+    """Linear congruential generator (glibc constants), 31-bit state."""
+    return (state * 1103515245 + 12345) & 0x7FFFFFFF
+
+
+def text_corpus(size: int) -> bytes:
+    out = bytearray()
+    state = 0x7E47
+    line = 0
+    while len(out) < size:
+        out += f"{line} ".encode()
+        for _ in range(4 + line % 9):
+            state = lcg_next(state)
+            out += WORDS[(state >> 16) % len(WORDS)].encode() + b" "
+        state = lcg_next(state)
+        out += f"{(state >> 8) % 100000}\n".encode()
+        line += 1
+    return bytes(out[:size])
+
+
+def binary_corpus(size: int) -> bytes:
+    out = bytearray(size)
+    state = 0xB1A
+    for i in range(size):
+        record, field = divmod(i, 16)
+        if field < 4:
+            out[i] = (record >> (8 * field)) & 0xFF
+        elif field == 4:
+            out[i] = record % 5
+        elif 8 <= field <= 11:
+            state = lcg_next(state)
+            out[i] = (state >> 16) & 0xFF
+    return bytes(out)
+
+
+def repetitive_corpus(size: int) -> bytes:
+    page = text_corpus(4096)
+    out = bytearray(size)
+    state = 0x4E9
+    for i in range(size):
+        state = lcg_next(state)
+        if (state >> 16) % 1000 == 0:
+            out[i] = (state >> 8) & 0xFF
+        else:
+            out[i] = page[i % 4096]
+    return bytes(out)
+
+
+def random_corpus(size: int) -> bytes:
+    out = bytearray(size)
+    state = 0x5EED
+    for i in range(size):
+        state = lcg_next(state)
+        out[i] = (state >> 16) & 0xFF
+    return bytes(out)
+
+
+def corpus(kind: str, size: int) -> bytes:
+    """Build `size` bytes of the given kind."""
+    return {
+        "text": text_corpus,
+        "binary": binary_corpus,
+        "repetitive": repetitive_corpus,
+        "random": random_corpus,
+    }[kind](size)
+
+# ---------------------------------------------------------------------------
+# CPython cases (names match cmd/bench/suite.mbt)
+# ---------------------------------------------------------------------------
+
+# MoonBit level name -> zlib level. Ultra has no zlib counterpart.
+ZLIB_LEVELS = {"None": 0, "Fast": 1, "Default": 6, "Best": 9}
+ZLIB_LEVELS.update({str(n): n for n in range(1, 10)})
+
+
+def raw_deflate(data: bytes, level: int) -> bytes:
+    c = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return c.compress(data) + c.flush()
+
+
+def zip_bytes(data: bytes) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+        for i, start in enumerate(range(0, len(data), MEMBER_SIZE)):
+            zf.writestr(f"m{i}.bin", data[start:start + MEMBER_SIZE])
+    return buf.getvalue()
+
+
+def read_zip(blob: bytes) -> int:
+    with zipfile.ZipFile(io.BytesIO(blob)) as zf:
+        return len(zf.infolist())
+
+
+def tar_bytes(data: bytes) -> bytes:
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w", format=tarfile.USTAR_FORMAT) as tf:
+        for i, start in enumerate(range(0, len(data), MEMBER_SIZE)):
+            chunk = data[start:start + MEMBER_SIZE]
+            info = tarfile.TarInfo(f"m{i}.bin")
+            info.size = len(chunk)
+            tf.addfile(info, io.BytesIO(chunk))
+    return buf.getvalue()
+
+
+def read_tar(blob: bytes) -> int:
+    total = 0
+    with tarfile.open(fileobj=io.BytesIO(blob), mode="r") as tf:
+        for member in tf.getmembers():
+            total += len(tf.extractfile(member).read())
+    return total
+
+
+def python_cases(data: bytes) -> List[Tuple[str, str, bool, Callable[[], int]]]:
+    """(case, variant, is_encoder, run) for one input; run returns output size."""
+    cases = [
+        ("crc32", "", False, lambda: zlib.crc32(data)),
+        ("adler32", "", False, lambda: zlib.adler32(data)),
+    ]
+    for name, level in ZLIB_LEVELS.items():
+        cases.append(("deflate", name, True,
+                      lambda level=level: len(raw_deflate(data, level))))
+    deflated = raw_deflate(data, 6)
+    gz = gzip.compress(data, compresslevel=6, mtime=0)
+    zipped = zip_bytes(data)
+    tarred = tar_bytes(data)
+    cases += [
+        ("inflate", "Default", False,
+         lambda: len(zlib.decompress(deflated, -15))),
+        ("gzip.compress", "Default", True,
+         lambda: len(gzip.compress(data, compresslevel=6, mtime=0))),
+        ("gzip.decompress", "Default", False,
+         lambda: len(gzip.decompress(gz))),
+        ("zip.to_bytes", "Default", True, lambda: len(zip_bytes(data))),
+        ("zip.of_bytes", "Default", False, lambda: read_zip(zipped)),
+        ("tar.to_bytes", "", False, lambda: len(tar_bytes(data))),
+        ("tar.of_bytes", "", False, lambda: read_tar(tarred)),
+    ]
+    return cases
+
+
+def batches_for(size: int) -> int:
+    """Minimum runs per case, as cmd/bench chooses its batch count."""
+    if size >= 16 * 1024 * 1024:
+        return 1
+    if size >= 1024 * 1024:
+        return 5
+    return 10
+
+
+def time_case(run: Callable[[], int], size: int) -> float:
+    """Mean microseconds per run over at least 0.2 s and `batches_for` runs."""
+    runs = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while runs < batches_for(size) or elapsed < 0.2:
+        run()
+        runs += 1
+        elapsed = time.perf_counter() - start
+    return elapsed * 1e6 / runs
+
+
+def python_report(sizes: List[int], case_filter: Optional[str]) -> dict:
+    """Run the CPython cases; same JSON shape as cmd/bench."""
+    corpora, results = [], []
+    for size in sizes:
+        for kind in CORPUS_KINDS:
+            data = corpus(kind, size)
+            corpora.append({"corpus": kind, "size": size,
+                            "crc32": zlib.crc32(data)})
+            for case, variant, encoder, run in python_cases(data):
+                if case_filter and case_filter not in case:
+                    continue
+                produced = run()
+                mean_us = time_case(run, size)
+                result = {
+                    "case": case, "variant": variant, "corpus": kind,
+                    "size": size, "mean_us": mean_us,
+                    "mb_per_s": size / mean_us if mean_us > 0 else 0.0,
+                }
+                if encoder and size > 0:
+                    result["ratio"] = produced / size
+                results.append(result)
+    return {"suite": "cpython", "corpora": corpora, "results": results}
+
+# ---------------------------------------------------------------------------
+# Running both sides
+# ---------------------------------------------------------------------------
+
+
+def find_moonbit_exe() -> Path:
+    """Build cmd/bench for the native target and locate the executable."""
+    subprocess.run(["moon", "build", "--target", "native", "--release"],
+                   cwd=ROOT, check=True)
+    for build_dir in ("target", "_build"):
+        for exe in sorted((ROOT / build_dir).glob("native/release/build/cmd/bench/bench.exe")):
+            return exe
+    sys.exit("cmd/bench executable not found after `moon build`; "
+             "pass --moonbit-exe")
+
+
+def run_measured(cmd: List[str]) -> Tuple[dict, int]:
+    """Run `cmd`, parse its JSON report and return it with peak RSS in KiB."""
+    proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.PIPE)
+    out = proc.stdout.read()
+    proc.stdout.close()
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        sys.exit(f"{' '.join(cmd)} exited with {proc.returncode}")
+    report = json.loads(out)
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    rss = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return report, rss
+
+
+def run_side(name: str, base_cmd: List[str], sizes: List[int],
+             case_filter: Optional[str]) -> dict:
+    """Run one implementation, one process per size."""
+    corpora, results, peak_rss = [], [], {}
+    for size in sizes:
+        cmd = base_cmd + ["--size", str(size)]
+        if case_filter:
+            cmd += ["--filter", case_filter]
+        print(f"running {name} at {size} bytes...", file=sys.stderr)
+        report, rss = run_measured(cmd)
+        corpora += report["corpora"]
+        results += report["results"]
+        peak_rss[str(size)] = rss
+    return {"corpora": corpora, "results": results, "peak_rss_kib": peak_rss}
+
+
+def check_corpora(moonbit: dict, python: dict) -> None:
+    """Both sides must have measured identical inputs."""
+    key = lambda c: (c["corpus"], c["size"])
+    mb = {key(c): c["crc32"] for c in moonbit["corpora"]}
+    for c in python["corpora"]:
+        if key(c) in mb and mb[key(c)] != c["crc32"]:
+            sys.exit(f"corpus mismatch for {key(c)}: "
+                     f"MoonBit {mb[key(c)]:#010x}, Python {c['crc32']:#010x}")
+
+# ---------------------------------------------------------------------------
+# Reporting and history
+# ---------------------------------------------------------------------------
+
+
+def result_key(r: dict) -> Tuple[str, str, str, int]:
+    return (r["case"], r["variant"], r["corpus"], r["size"])
+
+
+def print_table(moonbit: dict, python: dict) -> None:
+    py = {result_key(r): r for r in python["results"]}
+    header = (f"{'case':<16} {'variant':<8} {'corpus':<10} {'size':>9} "
+              f"{'MoonBit MB/s':>13} {'CPython MB/s':>13} {'x':>6} "
+              f"{'ratio MB':>9} {'ratio Py':>9}")
+    print(header)
+    print("-" * len(header))
+    for r in moonbit["results"]:
+        other = py.get(result_key(r))
+        py_speed = f"{other['mb_per_s']:13.1f}" if other else f"{'-':>13}"
+        factor = (f"{r['mb_per_s'] / other['mb_per_s']:6.2f}"
+                  if other and other["mb_per_s"] > 0 else f"{'-':>6}")
+        ratio = f"{r['ratio']:9.4f}" if "ratio" in r else f"{'':>9}"
+        py_ratio = (f"{other['ratio']:9.4f}"
+                    if other and "ratio" in other else f"{'':>9}")
+        print(f"{r['case']:<16} {r['variant']:<8} {r['corpus']:<10} "
+              f"{r['size']:>9} {r['mb_per_s']:13.1f} {py_speed} {factor} "
+              f"{ratio} {py_ratio}")
+    print()
+    for size, rss in moonbit["peak_rss_kib"].items():
+        py_rss = python["peak_rss_kib"].get(size, 0)
+        print(f"peak RSS at {size} bytes: MoonBit {rss} KiB, CPython {py_rss} KiB")
+
+
+def git_revision(history: Path) -> Tuple[str, bool]:
+    """Current commit and whether the work tree has local changes, not
+    counting the history file itself."""
+    pathspec = []
+    try:
+        relative = history.resolve().relative_to(ROOT)
+        pathspec = ["--", ".", ":(exclude)" + relative.as_posix()]
+    except ValueError:
+        pass
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain"] + pathspec,
+                               cwd=ROOT,
+                               capture_output=True, text=True,
+                               check=True).stdout.strip() != ""
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def load_history(path: Path) -> List[dict]:
+    if not path.exists():
+        return []
+    with path.open() as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def find_regressions(previous: dict, current: dict,
+                     threshold: float) -> List[str]:
+    """MoonBit cases whose MB/s dropped by more than `threshold`."""
+    before = {result_key(r): r["mb_per_s"]
+              for r in previous["moonbit"]["results"]}
+    found = []
+    for r in current["moonbit"]["results"]:
+        old = before.get(result_key(r))
+        if old and r["mb_per_s"] < old * (1 - threshold):
+            found.append(f"{r['case']} {r['variant']} {r['corpus']} "
+                         f"{r['size']}: {old:.1f} -> {r['mb_per_s']:.1f} MB/s")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare MoonBit zip/deflate throughput with CPython")
+    parser.add_argument("--size", type=int, action="append",
+                        help="Input size in bytes (repeatable; default 1 KiB and 1 MiB)")
+    parser.add_argument("--filter", help="Only cases whose name contains this")
+    parser.add_argument("--moonbit-exe", type=Path,
+                        help="Prebuilt cmd/bench executable (default: build it)")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY,
+                        help="JSON Lines file the run is appended to")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Slowdown reported as a regression (default 0.10)")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 when a regression is found")
+    parser.add_argument("--python-worker", action="store_true",
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sizes = args.size or DEFAULT_SIZES
+
+    if args.python_worker:
+        print(json.dumps(python_report(sizes, args.filter)))
+        return
+
+    exe = args.moonbit_exe or find_moonbit_exe()
+    moonbit = run_side("MoonBit", [str(exe)], sizes, args.filter)
+    python = run_side(
+        "CPython", [sys.executable, str(Path(__file__).resolve()), "--python-worker"],
+        sizes, args.filter)
+    check_corpora(moonbit, python)
+    print_table(moonbit, python)
+
+    commit, dirty = git_revision(args.history)
+    entry = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": commit,
+        "dirty": dirty,
+        "host": platform.node(),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "moonbit": moonbit,
+        "cpython": python,
+    }
+    previous = [h for h in load_history(args.history)
+                if h["host"] == entry["host"] and h["commit"] != commit]
+    regressions = find_regressions(previous[-1], entry, args.threshold) if previous else []
+    args.history.parent.mkdir(parents=True, exist_ok=True)
+    with args.history.open("a") as f:
+        f.write(json.dumps(entry) + "\n")
+    print(f"\nappended run to {args.history}")
+    if regressions:
+        print(f"\nregressions against {previous[-1]['commit'][:12]}:")
+        for line in regressions:
+            print(f"  {line}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -237,6 +237,12 @@ def main():
         choices=range(0, 10),
         help="Compression level (0-9, default: 6)"
     )
+    parser.add_argument(
+        "--moonbit",
+        metavar="HEX",
+        help="With --compress: MoonBit output for the same input, compressed "
+             "with DeflateLevel::Level(--level), to compare against zlib"
+    )
     
     args = parser.parse_args()
     
@@ -255,6 +261,11 @@ def main():
                 print(data)
         sys.exit(0 if success else 1)
     
+    elif args.compress and args.moonbit:
+        success, msg = verify_compress(args.compress, args.moonbit, args.level)
+        print(msg)
+        sys.exit(0 if success else 1)
+    
     elif args.compress:
         try:
             input_data = hex_to_bytes(args.compress)